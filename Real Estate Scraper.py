@@ -1,30 +1,116 @@
 import scrapy
+from scrapy import signals
 from scrapy.crawler import CrawlerProcess
-from scrapy.utils.project import get_project_settings
+from scrapy.exceptions import DropItem
+from scrapy.exporters import BaseItemExporter
+from scrapy.spiders import SitemapSpider
+from scrapy.utils.sitemap import sitemap_urls_from_robots
+from itemadapter import ItemAdapter
+from dataclasses import dataclass
 import os
 import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.base import MIMEBase
-from email import encoders
+import atexit
+import gzip
+import io
+import shutil
+from email.message import EmailMessage
 import sys
-import shutil  # For temporary file cleanup
-
-
-# Define the Scrapy Item structure.
+import re
+import socket
+from urllib.parse import urljoin, urlparse
+from selectolax.lexbor import LexborHTMLParser
+
+
+# CSS selectors used by the spider.
+# Pages are parsed with selectolax (lexbor), which matches CSS selectors natively
+# without translating them to XPath first.
+# --- IMPORTANT: CUSTOMIZE THESE SELECTORS ---
+# Listing container.
+_LISTING_CSS = ('body > div.PageContent.mt-0 > div > div > div > div.ldc_left > div.mr-4.pr-md-5 > div'
+                ' > div.col-md.col-12 > h1')
+# Map of span class -> item field. All four fields are fetched with one query per listing
+# ('span.address, span.price, span.home-size, span.lot-size') and then sorted by class,
+# instead of running four separate queries.
+_FIELD_CLASSES = {
+    'address': 'address',
+    'price': 'sale_price',
+    'home-size': 'home_size_sqft',
+    'lot-size': 'lot_size_sqft',
+}
+_FIELDS_CSS = ', '.join(f'span.{name}' for name in _FIELD_CLASSES)
+_NEXT_CSS = 'a.next-page'  # 'Next' page link
+_PAGER_CSS = 'a.page'  # Numbered page links
+# Page number in a pager link such as '/homes?page=3'.
+_PAGE_NUM = re.compile(r'[?&]page=(\d+)')
+
+# Fields holding numbers, and the characters stripped from them during cleaning.
+# str.translate() removes currency symbols, commas, 'sqft' and whitespace in a single pass.
+# The result is only used when it is a whole number, since the table also deletes those
+# letters from words (e.g. 'acres' would become 'acre').
+_NUMERIC_FIELDS = ('sale_price', 'home_size_sqft', 'lot_size_sqft')
+_CLEAN = str.maketrans('', '', '$,sqftSQFT \t\r\n')
+
+
+# Define the item structure.
 # This defines the fields that our spider will extract for each real estate listing.
-class RealEstateItem(scrapy.Item):
-    address = scrapy.Field()  # Address of the property
-    sale_price = scrapy.Field()  # Sale price of the property
-    home_size_sqft = scrapy.Field()  # Home size in square feet
-    lot_size_sqft = scrapy.Field()  # Lot size in square feet
+# A slotted dataclass is cheaper to create than a scrapy.Item; Scrapy's pipelines and
+# exporters support dataclass items directly.
+@dataclass(slots=True)
+class RealEstateItem:
+    address: str | None = None  # Address of the property
+    sale_price: int | str | None = None  # Sale price of the property
+    home_size_sqft: int | str | None = None  # Home size in square feet
+    lot_size_sqft: int | str | None = None  # Lot size in square feet
+
+
+# Define an item pipeline that drops listings already seen on an earlier page.
+# Real estate sites often show the same (e.g. 'featured') listing on several pages.
+# A scalable Bloom filter keyed on the address needs only a few bits per listing; its rare
+# false positives may drop a new listing, at a rate of about 1 in 10,000.
+class DedupePipeline:
+    def open_spider(self):
+        from pybloom_live import ScalableBloomFilter
+        self.seen = ScalableBloomFilter(initial_capacity=10000, error_rate=1e-4)
+
+    def process_item(self, item):
+        # The spider only yields listings that have an address (see RealEstateSpider._build_item).
+        address = ItemAdapter(item)['address']
+        key = address.encode()
+        if key in self.seen:
+            raise DropItem(f"Duplicate listing: {address}")
+        self.seen.add(key)
+        return item
+
+
+# Define a feed exporter that writes one JSON object per line (JSON Lines) using orjson.
+# orjson serializes each item in C, which is much faster than Scrapy's built-in exporters,
+# and keeps the numeric fields as JSON numbers.
+class OrjsonLinesExporter(BaseItemExporter):
+    def __init__(self, file, **kwargs):
+        import orjson
+        # dont_fail=True ignores feed options that only apply to other formats (e.g. 'indent').
+        super().__init__(dont_fail=True, **kwargs)
+        self.file = file
+        self.dumps = orjson.dumps
+
+    def export_item(self, item):
+        # get_serialized_fields yields the fields in the order given by the feed's 'fields' option.
+        self.file.write(self.dumps(dict(self.get_serialized_fields(item))))
+        self.file.write(b'\n')
 
 
 # Define the Scrapy Spider.
 # This spider will crawl the specified website, extract the data, and yield RealEstateItem objects.
-class RealEstateSpider(scrapy.Spider):
+# When the start URL is the site's home page and robots.txt points to a sitemap, every listing page
+# in the sitemap is requested at once. Otherwise, or when the sitemap has no listing pages, the
+# spider walks the listing pages starting from start_urls.
+class RealEstateSpider(SitemapSpider):
     name = "realestate_scraper"  # Unique name for the spider
 
+    # Sitemap URLs matching these patterns are parsed as single listing pages by parse_listing.
+    # Adjust r'/listing/' to the URL pattern of the listing pages on the website you are scraping.
+    sitemap_rules = [(r'/listing/', 'parse_listing')]
+
     # start_urls will be set dynamically by the main script based on user input.
     # We use __init__ to accept the start_urls argument.
     def __init__(self, start_urls=None, *args, **kwargs):
@@ -32,86 +118,275 @@ class RealEstateSpider(scrapy.Spider):
         if start_urls:
             # Scrapy expects start_urls as a list, even if it's a single URL.
             self.start_urls = [start_urls]
+            # The sitemaps are looked up in the site's robots.txt.
+            self.sitemap_urls = [urljoin(start_urls, '/robots.txt')]
+            # Only use the sitemap when crawling the whole site (the start URL is the home page).
+            # A more specific start URL, such as a search results page, is crawled as given.
+            parsed_url = urlparse(start_urls)
+            self.use_sitemap = parsed_url.path in ('', '/') and not parsed_url.query
+            # Sitemaps still to be parsed, and the number of listing pages found in them so far.
+            self._pending_sitemaps = 0
+            self._sitemap_listings = 0
         else:
             # Raise an error if no starting URL is provided.
             raise ValueError("start_urls must be provided to the spider.")
 
     # Custom settings for this spider.
-    # We configure the output format (CSV) and the fields to be included.
+    # We configure the output format (JSON Lines) and the fields to be included.
     # We also set a user agent to mimic a real browser request.
     custom_settings = {
         'FEEDS': {
-            'output.csv': {
-                'format': 'csv',  # Output format is CSV
+            'output.jsonl': {
+                'format': 'jsonl',  # Output format is JSON Lines, written by OrjsonLinesExporter
                 'overwrite': True,  # Overwrite the file if it exists
-                # Define the order of columns in the CSV.
+                # Define the order of fields in each line.
                 'fields': ['address', 'sale_price', 'home_size_sqft', 'lot_size_sqft'],
             },
         },
+        'FEED_EXPORTERS': {
+            'jsonl': '__main__.OrjsonLinesExporter',
+        },
+        'ITEM_PIPELINES': {
+            '__main__.DedupePipeline': 100,  # Runs before the feed exporter, so duplicates are never saved
+        },
         # ROBOTSTXT_OBEY should generally be True, but for specific scraping needs,
         # it might be set to False. Be cautious and respectful of website policies.
         'ROBOTSTXT_OBEY': False,
         # A common user agent to avoid being blocked by some websites.
         'USER_AGENT': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        # Scraping is network-bound, so allow many requests in flight at once.
+        # The main script lets the user lower these for fragile target sites.
+        'CONCURRENT_REQUESTS': 64,
+        'CONCURRENT_REQUESTS_PER_DOMAIN': 16,
+        # Thread pool size used by the reactor (e.g. for DNS resolution).
+        'REACTOR_THREADPOOL_MAXSIZE': 32,
+        # Cache DNS lookups so paginated requests to the same host don't resolve again.
+        'TWISTED_DNS_RESOLVER': 'scrapy.resolver.CachingHostnameResolver',
+        'DNSCACHE_ENABLED': True,
+        'DNSCACHE_SIZE': 10000,
+        'DNS_TIMEOUT': 5,  # Seconds to wait for a DNS lookup
+        # AutoThrottle adapts the delay between requests to the server's response times,
+        # pushing towards the target concurrency without hammering slow servers.
+        'AUTOTHROTTLE_ENABLED': True,
+        'AUTOTHROTTLE_START_DELAY': 0.5,
+        'AUTOTHROTTLE_MAX_DELAY': 10.0,
+        'AUTOTHROTTLE_TARGET_CONCURRENCY': 8.0,
+        'DOWNLOAD_DELAY': 0,
+        # Use HTTP/2 for HTTPS sites: requests to the same host are multiplexed over one
+        # connection instead of paying a new TCP + TLS handshake for each page.
+        # Plain HTTP keeps the default handler, since HTTP/2 cleartext (h2c) isn't supported.
+        # Requires the 'Twisted[http2]' extra (see Requirments.txt).
+        'DOWNLOAD_HANDLERS': {
+            'https': 'scrapy.core.downloader.handlers.http2.H2DownloadHandler',
+        },
+        'TWISTED_REACTOR': 'twisted.internet.asyncioreactor.AsyncioSelectorReactor',
+        # Cache downloaded pages on disk (in .scrapy/httpcache) for an hour, so re-running the
+        # scraper while adjusting the selectors doesn't download the same pages again.
+        # RFC2616Policy respects the site's own Cache-Control headers.
+        'HTTPCACHE_ENABLED': True,
+        'HTTPCACHE_EXPIRATION_SECS': 3600,
+        'HTTPCACHE_STORAGE': 'scrapy.extensions.httpcache.FilesystemCacheStorage',
+        'HTTPCACHE_POLICY': 'scrapy.extensions.httpcache.RFC2616Policy',
+        # Ask for compressed responses, including Brotli (requires the 'brotli' package).
+        # The Accept headers are Scrapy's defaults, which this setting would otherwise replace.
+        'DEFAULT_REQUEST_HEADERS': {
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en',
+            'Accept-Encoding': 'gzip, deflate, br',
+        },
     }
 
-    # The parse method is called for each downloaded response.
-    # It's responsible for parsing the response data and extracting information.
+    # Scrapy 2.13+ calls start(); older versions call start_requests().
+    async def start(self):
+        for request in self.start_requests():
+            yield request
+
+    # Request robots.txt first (when using the sitemap), to find out whether the site has a sitemap.
+    def start_requests(self):
+        for robots_url, start_url in zip(self.sitemap_urls, self.start_urls):
+            if self.use_sitemap:
+                yield scrapy.Request(robots_url, self._parse_robots, errback=self._no_sitemap,
+                                     cb_kwargs={'start_url': start_url})
+            else:
+                yield scrapy.Request(start_url, self.parse)
+
+    # Follows the sitemaps listed in robots.txt, or falls back to start_url if there are none.
+    def _parse_robots(self, response, start_url):
+        sitemaps = list(sitemap_urls_from_robots(response.body, base_url=response.url))
+        if not sitemaps:
+            self.logger.info("No sitemap found in robots.txt, crawling the listing pages instead.")
+            yield scrapy.Request(start_url, self.parse)
+            return
+        self._pending_sitemaps += len(sitemaps)
+        for url in sitemaps:
+            yield scrapy.Request(url, self._parse_sitemap, errback=self._sitemap_failed)
+
+    # Called when robots.txt can't be downloaded (e.g. 404), so there's no sitemap to use.
+    def _no_sitemap(self, failure):
+        self.logger.info("robots.txt not available, crawling the listing pages instead.")
+        yield scrapy.Request(failure.request.cb_kwargs['start_url'], self.parse)
+
+    # SitemapSpider handles sitemap indexes and requests every page matching sitemap_rules.
+    # This wrapper counts the nested sitemaps and listing pages, so the spider can fall back to
+    # start_url once every sitemap has been parsed without finding a single listing page.
+    def _parse_sitemap(self, response):
+        self._pending_sitemaps -= 1
+        for request in super()._parse_sitemap(response):
+            if request.callback == self._parse_sitemap:
+                self._pending_sitemaps += 1
+                request = request.replace(errback=self._sitemap_failed)
+            else:
+                self._sitemap_listings += 1
+            yield request
+        yield from self._fallback_if_no_listings()
+
+    # Called when a sitemap can't be downloaded.
+    def _sitemap_failed(self, failure):
+        self._pending_sitemaps -= 1
+        yield from self._fallback_if_no_listings()
+
+    # Crawls start_url instead once all sitemaps are done and none of them had a listing page.
+    def _fallback_if_no_listings(self):
+        if self._pending_sitemaps == 0 and self._sitemap_listings == 0:
+            self.logger.info("No sitemap URLs match sitemap_rules, crawling the listing pages instead.")
+            yield scrapy.Request(self.start_urls[0], self.parse)
+
+    # Parses a single listing page found in the sitemap.
+    def parse_listing(self, response):
+        tree = LexborHTMLParser(response.text)
+        item = self._build_item(tree.body)
+        if item is not None:
+            yield item
+
+    # The parse method is called for the first page downloaded from start_urls.
+    # It extracts the page's listings and then schedules the remaining pages.
     def parse(self, response):
-        # --- IMPORTANT: CUSTOMIZE THESE SELECTORS ---
-        # You need to replace these CSS selectors with the actual ones that match the HTML
-        # structure of the website you are scraping. Use your browser's developer tools
-        # (Inspect Element) to find the correct classes or IDs.
+        tree = LexborHTMLParser(response.text)
+        yield from self._extract_listings(tree, response)
+
+        # --- Pagination Handling (Optional, but often necessary) ---
+        # If the page has a numbered pager, request every page at once so Scrapy downloads them
+        # in parallel (up to CONCURRENT_REQUESTS_PER_DOMAIN) instead of one after another.
+        # Adjust _PAGER_CSS to the selector for the numbered page links.
+        pages = [href for node in tree.css(_PAGER_CSS) if (href := node.attributes.get('href'))]
+        numbered = [(int(m.group(1)), href, m) for href in pages if (m := _PAGE_NUM.search(href))]
+        if numbered:
+            # Pagers often skip the middle pages ('1 2 3 ... 40'). If the links carry a page
+            # number, build the URL of every page after this one up to the highest one instead.
+            last, href, m = max(numbered, key=lambda page: page[0])
+            current = _PAGE_NUM.search(response.url)
+            current = int(current.group(1)) if current else 1
+            if last > current:
+                for n in range(current + 1, last + 1):
+                    page = href[:m.start(1)] + str(n) + href[m.end(1):]
+                    # Pagers often only show the pages near the current one ('1 2 3 ... Next'),
+                    # so the highest page is parsed with this method again to find any pages
+                    # beyond it. The pages before it don't need to look for further pages.
+                    yield response.follow(page, self.parse if n == last else self.parse_listings_only)
+                return
+        elif pages:
+            # Without page numbers there's no telling how far the pager reaches, so every linked
+            # page looks for further pages itself. Scrapy skips pages that were already requested.
+            for page in pages:
+                yield response.follow(page, self.parse)
+            return
+
+        # Fall back to following the 'Next' link one page at a time when there is no pager,
+        # or when this is the highest page the pager shows.
+        # Adjust _NEXT_CSS to the selector for the 'Next' page link.
+        next_link = tree.css_first(_NEXT_CSS)
+        next_page = next_link.attributes.get('href') if next_link is not None else None
+        if next_page is not None:
+            # Use response.follow to create a new request for the next page and parse it with the same method.
+            yield response.follow(next_page, self.parse)
 
-        # Example: Assuming each real estate listing is contained within a <div> with class 'listing'.
-        # Adjust 'div.listing' to the correct selector for a single listing container.
-        listings = response.css('body > div.PageContent.mt-0 > div > div > div > div.ldc_left > div.mr-4.pr-md-5 > div > div.col-md.col-12 > h1')
+    # Extracts the listings of a single page, without any pagination handling.
+    def parse_listings_only(self, response):
+        yield from self._extract_listings(LexborHTMLParser(response.text), response)
+
+    # Extracts the listings from an already parsed page.
+    def _extract_listings(self, tree, response):
+        # --- IMPORTANT: CUSTOMIZE THESE SELECTORS ---
+        # The selectors are defined at the top of this file (_LISTING_CSS, _FIELD_CLASSES, ...).
+        # Replace them with ones that match the HTML structure of the website you are scraping.
+        # Use your browser's developer tools (Inspect Element) to find the correct classes or IDs.
+        listings = tree.css(_LISTING_CSS)
 
         # Log a warning if no listings are found, which might indicate incorrect selectors.
         if not listings:
             self.logger.warning(
-                "No listings found with the provided selector. Please check the 'div.listing' selector.")
+                "No listings found with the provided selector. Please check the _LISTING_CSS selector.")
             self.logger.info(f"Response URL: {response.url}")
 
         # Iterate through each found listing to extract the data.
         for listing in listings:
-            item = RealEstateItem()
-            # Extract data using specific CSS selectors for each field.
-            # .get() is used to retrieve the first matching element's text.
-            # If the data is within an attribute, use '::attr(attribute_name)'.
-            # For text directly inside a tag, use '::text'.
-
-            # Adjust 'span.address::text' to the correct selector for the property address.
-            item['address'] = listing.css('span.address::text').get()
-            # Adjust 'span.price::text' for the sale price.
-            item['sale_price'] = listing.css('span.price::text').get()
-            # Adjust 'span.home-size::text' for the home size.
-            item['home_size_sqft'] = listing.css('span.home-size::text').get()
-            # Adjust 'span.lot-size::text' for the lot size.
-            item['lot_size_sqft'] = listing.css('span.lot-size::text').get()
-
-            # --- Data Cleaning and Normalization ---
-            # Remove currency symbols, commas, and 'sqft' text, and strip whitespace.
-            if item['sale_price']:
-                item['sale_price'] = item['sale_price'].replace('$', '').replace(',', '').strip()
-            if item['home_size_sqft']:
-                item['home_size_sqft'] = item['home_size_sqft'].replace('sqft', '').replace(',', '').strip()
-            if item['lot_size_sqft']:
-                item['lot_size_sqft'] = item['lot_size_sqft'].replace('sqft', '').replace(',', '').strip()
-
-            # Yield the item, which will be processed by Scrapy's item pipelines (in this case, the CSV exporter).
-            yield item
+            item = self._build_item(listing)
+            if item is not None:
+                # Yield the item, which will be processed by Scrapy's item pipelines (in this case, the JSON Lines exporter).
+                yield item
+
+    # Builds a RealEstateItem from the fields found inside the given node.
+    # Returns None for incomplete listings without an address.
+    def _build_item(self, listing):
+        # Adjust _FIELD_CLASSES to the span classes holding each field.
+        # Spans come back in document order; the first one found for each field is kept.
+        fields = dict.fromkeys(_FIELD_CLASSES.values())
+        for span in listing.css(_FIELDS_CSS):
+            for name in (span.attributes.get('class') or '').split():
+                field = _FIELD_CLASSES.get(name)
+                if field and fields[field] is None:
+                    fields[field] = span.text(strip=True) or None
+
+        # Skip incomplete listings before doing any cleaning or creating an item.
+        # The address is the gate because a listing can't be identified (or deduplicated) without it.
+        if not fields['address']:
+            return None
+
+        # --- Data Cleaning and Normalization ---
+        # Remove currency symbols, commas, 'sqft' text and whitespace, then store plain
+        # numbers as int. Values that aren't a whole number after cleaning (e.g. '0.5 acres')
+        # are kept as the original text.
+        for k in _NUMERIC_FIELDS:
+            v = fields[k]
+            if v:
+                cleaned = v.translate(_CLEAN)
+                fields[k] = int(cleaned) if cleaned.isdecimal() else v.strip()
+        return RealEstateItem(**fields)
+
+
+# SMTP connection shared by every email sent during this run.
+# Connecting, negotiating TLS and logging in only happens once, not for each email.
+_smtp = None
+
+
+# Function to return the shared SMTP connection, connecting and logging in on first use.
+def _smtp_singleton(sender_email, sender_password):
+    global _smtp
+    if _smtp is None:
+        # For Gmail, use 'smtp.gmail.com' and port 465. SMTP_SSL starts TLS right away,
+        # saving the extra round trip of STARTTLS on port 587.
+        # Adjust host and port for other email providers (e.g., Outlook, Yahoo).
+        server = smtplib.SMTP_SSL('smtp.gmail.com', 465)
+        server.login(sender_email, sender_password)  # Login to the email account
+        _smtp = server
+    return _smtp
 
-        # --- Pagination Handling (Optional, but often necessary) ---
-        # This part handles navigating to the next page of listings if available.
-        # Adjust 'a.next-page::attr(href)' to the selector for the 'Next' page link's href attribute.
-        next_page = response.css('a.next-page::attr(href)').get()
-        if next_page is not None:
-            # Use response.follow to create a new request for the next page and parse it with the same method.
-            yield response.follow(next_page, self.parse)
+
+# Function to close the shared SMTP connection, if one is open. Runs when the script exits.
+def _close_smtp():
+    global _smtp
+    if _smtp is not None:
+        try:
+            _smtp.quit()  # Disconnect from the server
+        except smtplib.SMTPException:
+            pass  # The server already closed the connection
+        _smtp = None
+
+
+atexit.register(_close_smtp)
 
 
-# Function to send the generated CSV file via email.
+# Function to send the generated data file via email.
 def send_email(receiver_email, subject, body, attachment_path):
     # Retrieve sender email and password from environment variables for security.
     sender_email = os.environ.get("SENDER_EMAIL")
@@ -124,45 +399,42 @@ def send_email(receiver_email, subject, body, attachment_path):
         print("See: https://support.google.com/accounts/answer/185833?hl=en for Gmail App Passwords.")
         return
 
-    # Create a multipart message and set headers.
-    msg = MIMEMultipart()
+    # Create the message and set headers.
+    msg = EmailMessage()
     msg['From'] = sender_email
     msg['To'] = receiver_email
     msg['Subject'] = subject
 
-    # Attach the body text to the email.
-    msg.attach(MIMEText(body, 'plain'))
+    # Set the body text of the email.
+    msg.set_content(body)
 
-    # Attach the CSV file.
+    # Attach the data file, gzip-compressed.
+    # JSON Lines data compresses very well, so this keeps the upload to the SMTP server small.
     try:
-        with open(attachment_path, "rb") as attachment:
-            # Create a MIMEBase object for the attachment.
-            part = MIMEBase("application", "octet-stream")
-            # Set payload to the attachment's raw data.
-            part.set_payload(attachment.read())
-        # Encode the payload in base64.
-        encoders.encode_base64(part)
-        # Add header for the attachment, specifying the filename.
-        part.add_header(
-            "Content-Disposition",
-            f"attachment; filename= {os.path.basename(attachment_path)}",
+        # Compress the file in 64 KB chunks, so only the compressed data is held in memory
+        # rather than the whole uncompressed file as well.
+        buf = io.BytesIO()
+        with open(attachment_path, "rb") as attachment, gzip.GzipFile(fileobj=buf, mode="wb") as gz:
+            shutil.copyfileobj(attachment, gz, 64 * 1024)
+        # add_attachment takes care of the base64 encoding and the Content-Disposition header.
+        msg.add_attachment(
+            buf.getvalue(),
+            maintype="application",
+            subtype="gzip",
+            filename=f"{os.path.basename(attachment_path)}.gz",
         )
-        # Attach the part to the message.
-        msg.attach(part)
     except FileNotFoundError:
         print(f"Error: Attachment file not found at {attachment_path}. Skipping email.")
         return
 
-    # Connect to the SMTP server and send the email.
+    # Send the email over the shared SMTP connection.
     try:
-        # For Gmail, use 'smtp.gmail.com' and port 587 with TLS.
-        # Adjust host and port for other email providers (e.g., Outlook, Yahoo).
-        server = smtplib.SMTP('smtp.gmail.com', 587)
-        server.starttls()  # Secure the connection with TLS (Transport Layer Security)
-        server.login(sender_email, sender_password)  # Login to the email account
-        text = msg.as_string()  # Convert the MIMEMultipart object to a string
-        server.sendmail(sender_email, receiver_email, text)  # Send the email
-        server.quit()  # Disconnect from the server
+        try:
+            _smtp_singleton(sender_email, sender_password).send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # The server closed the cached connection (e.g. after being idle); reconnect once.
+            _close_smtp()
+            _smtp_singleton(sender_email, sender_password).send_message(msg)
         print(f"Email sent successfully to {receiver_email}!")
     except Exception as e:
         print(f"Error sending email: {e}")
@@ -183,132 +455,76 @@ if __name__ == "__main__":
         sys.exit(1)  # Exit if no URL is provided
 
     # Prompt user for the recipient email address.
-    receiver_email = input("Please enter the email address where you want to receive the CSV file: ")
+    receiver_email = input("Please enter the email address where you want to receive the data file: ")
     if not receiver_email:
         print("Receiver email cannot be empty. Exiting.")
         sys.exit(1)  # Exit if no email is provided
 
-    output_csv_file = 'output.csv'  # Name of the output CSV file
+    # Prompt user for the maximum number of concurrent requests.
+    # Lower values are gentler on fragile or rate-limited websites.
+    concurrency = input("Please enter the maximum number of concurrent requests (press Enter for 64): ")
+    if not concurrency:
+        concurrency = 64
+    elif concurrency.isdecimal() and int(concurrency) > 0:
+        concurrency = int(concurrency)
+    else:
+        print("Concurrent requests must be a positive whole number. Exiting.")
+        sys.exit(1)  # Exit if the value is invalid
+    # Never allow more requests to a single domain than in total.
+    concurrency_per_domain = min(concurrency, 16)
+    # Store them in the spider's custom_settings, which hold all the settings for the crawl.
+    RealEstateSpider.custom_settings['CONCURRENT_REQUESTS'] = concurrency
+    RealEstateSpider.custom_settings['CONCURRENT_REQUESTS_PER_DOMAIN'] = concurrency_per_domain
+    # AutoThrottle can't reach more parallel requests than the per-domain limit allows.
+    autothrottle_target = min(8.0, concurrency_per_domain)
+    RealEstateSpider.custom_settings['AUTOTHROTTLE_TARGET_CONCURRENCY'] = autothrottle_target
+
+    output_file = 'output.jsonl'  # Name of the output JSON Lines file
 
     print(f"\nStarting the scraping process for {website_url}...")
-    print(f"Data will be saved to {output_csv_file}")
+    print(f"Data will be saved to {output_file}")
 
-    # Scrapy requires a project structure to load settings.
-    # We create a temporary, minimal structure for programmatic execution.
-    temp_project_dir = 'scrapy_temp_project'
-    temp_spiders_dir = os.path.join(temp_project_dir, 'spiders')
-
-    try:
-        # Create temporary directories if they don't exist.
-        if not os.path.exists(temp_spiders_dir):
-            os.makedirs(temp_spiders_dir)
-
-        # Write a dummy settings.py to the temporary project directory.
-        # This ensures Scrapy can find necessary configurations like FEEDS.
-        with open(os.path.join(temp_project_dir, 'settings.py'), 'w') as f:
-            f.write(f"""
-BOT_NAME = '{temp_project_dir}'
-SPIDER_MODULES = ['{temp_project_dir}.spiders']
-NEWSPIDER_MODULE = '{temp_project_dir}.spiders'
-ROBOTSTXT_OBEY = False # Set to True for production and respect robots.txt
-USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-FEEDS = {{
-    '{output_csv_file}': {{
-        'format': 'csv',
-        'overwrite': True,
-        'fields': ['address', 'sale_price', 'home_size_sqft', 'lot_size_sqft'],
-    }},
-}}
-# Disable default pipelines if any, or enable custom ones here
-ITEM_PIPELINES = {{}}
-""")
-        # Write the spider code to the temporary spiders directory.
-        # This ensures the CrawlerProcess can locate and run our spider.
-        with open(os.path.join(temp_spiders_dir, 'realestate_spider.py'), 'w') as f:
-            f.write("""
-import scrapy
-
-# Item definition copied into the spider file for self-containment in the temporary project
-class RealEstateItem(scrapy.Item):
-    address = scrapy.Field()
-    sale_price = scrapy.Field()
-    home_size_sqft = scrapy.Field()
-    lot_size_sqft = scrapy.Field()
-
-class RealEstateSpider(scrapy.Spider):
-    name = "realestate_scraper"
-
-    def __init__(self, start_urls=None, *args, **kwargs):
-        super(RealEstateSpider, self).__init__(*args, **kwargs)
-        if start_urls:
-            self.start_urls = [start_urls]
-        else:
-            raise ValueError("start_urls must be provided to the spider.")
-
-    def parse(self, response):
-        # IMPORTANT: Replace these CSS selectors with the actual ones for the website you are scraping.
-        # Use your browser's developer tools (Inspect Element) to find the correct selectors.
-        listings = response.css('div.listing') # Example selector for listing containers
-
-        if not listings:
-            self.logger.warning("No listings found with the provided selector. Please check the 'div.listing' selector.")
-            self.logger.info(f"Response URL: {response.url}")
-
-        for listing in listings:
-            item = RealEstateItem()
-            item['address'] = listing.css('span.address::text').get() # Example selector for address
-            item['sale_price'] = listing.css('span.price::text').get() # Example selector for sale price
-            item['home_size_sqft'] = listing.css('span.home-size::text').get() # Example selector for home size
-            item['lot_size_sqft'] = listing.css('span.lot-size::text').get() # Example selector for lot size
-
-            # Clean and normalize data
-            if item['sale_price']:
-                item['sale_price'] = item['sale_price'].replace('$', '').replace(',', '').strip()
-            if item['home_size_sqft']:
-                item['home_size_sqft'] = item['home_size_sqft'].replace('sqft', '').replace(',', '').strip()
-            if item['lot_size_sqft']:
-                item['lot_size_sqft'] = item['lot_size_sqft'].replace('sqft', '').replace(',', '').strip()
-
-            yield item
-
-        # Follow pagination links if available
-        next_page = response.css('a.next-page::attr(href)').get() # Example selector for next page link
-        if next_page is not None:
-            yield response.follow(next_page, self.parse)
-""")
-
-        # Set the SCRAPY_SETTINGS_MODULE environment variable to point to our temporary settings file.
-        os.environ['SCRAPY_SETTINGS_MODULE'] = f'{temp_project_dir}.settings'
-        # Add the current directory (where temp_project_dir is created) to Python's path.
-        # This helps Scrapy find the spider module.
-        sys.path.append(os.getcwd())
-
-        # Initialize CrawlerProcess with Scrapy project settings.
-        process = CrawlerProcess(get_project_settings())
-        # Start the crawl process with our spider, passing the user-provided URL.
-        process.crawl(RealEstateSpider, start_urls=website_url)
-        process.start()  # This blocks until the crawling is finished.
+    # Called as soon as the spider has finished and the feed exporter has written the output file.
+    # The email is sent from a reactor thread, so connecting to the SMTP server and uploading
+    # overlap with Scrapy shutting down. The reactor waits for the thread before process.start() returns.
+    def on_feed_exporter_closed():
+        from twisted.internet import reactor  # Imported here, after Scrapy has installed the reactor
 
         print("\nScraping complete. Checking for output file...")
-        # Check if the CSV file was created and contains data.
-        if os.path.exists(output_csv_file) and os.path.getsize(output_csv_file) > 0:
-            print(f"CSV file '{output_csv_file}' created successfully.")
-            # If the CSV is created, proceed to send the email.
+        # Check if the JSON Lines file was created and contains data.
+        if os.path.exists(output_file) and os.path.getsize(output_file) > 0:
+            print(f"JSON Lines file '{output_file}' created successfully.")
+            # If the JSON Lines file is created, proceed to send the email.
             subject = "Scraped Real Estate Data"
             body = f"Please find the scraped real estate data from {website_url} attached."
-            send_email(receiver_email, subject, body, output_csv_file)
+            reactor.callInThread(send_email, receiver_email, subject, body, output_file)
         else:
-            print(f"Warning: '{output_csv_file}' was not created or is empty. No email sent.")
+            print(f"Warning: '{output_file}' was not created or is empty. No email sent.")
             print("This could mean no data was scraped. Please verify your spider's CSS selectors.")
 
+    try:
+        # The spider's custom_settings hold everything the crawl needs, so no Scrapy project
+        # has to be written to disk. They are passed to CrawlerProcess as well, since process-wide
+        # settings such as TWISTED_DNS_RESOLVER and REACTOR_THREADPOOL_MAXSIZE are only read from there.
+        process = CrawlerProcess(RealEstateSpider.custom_settings)
+        crawler = process.create_crawler(RealEstateSpider)
+        # Send the email from on_feed_exporter_closed once the spider is done.
+        # feed_exporter_closed (rather than spider_closed) fires after the output file is complete.
+        crawler.signals.connect(on_feed_exporter_closed, signal=signals.feed_exporter_closed)
+        # Resolve the website's host name now, so the system's DNS cache is already warm
+        # when Scrapy sends its first request.
+        parsed_url = urlparse(website_url)
+        try:
+            socket.getaddrinfo(parsed_url.hostname, parsed_url.port or (443 if parsed_url.scheme == 'https' else 80))
+        except (socket.gaierror, UnicodeError):
+            # Scrapy will report the lookup error itself when it requests the page.
+            pass
+        # Start the crawl process with our spider, passing the user-provided URL.
+        process.crawl(crawler, start_urls=website_url)
+        process.start()  # This blocks until the crawling is finished and the email has been sent.
+
     except Exception as e:
         print(f"\nAn error occurred during scraping: {e}")
-    finally:
-        # Clean up the temporary Scrapy project files after execution.
-        if os.path.exists(temp_project_dir):
-            print(f"\nCleaning up temporary Scrapy project files in '{temp_project_dir}'...")
-            shutil.rmtree(temp_project_dir)
-        print("Temporary files cleaned up.")
-        # Ensure the output CSV file is also removed for clean runs if desired, or keep it.
-        # If you want to automatically remove the output.csv uncomment the next line:
-        # if os.path.exists(output_csv_file): os.remove(output_csv_file)
+    # Ensure the output JSON Lines file is also removed for clean runs if desired, or keep it.
+    # If you want to automatically remove the output.jsonl uncomment the next line:
+    # if os.path.exists(output_file): os.remove(output_file)